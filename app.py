@@ -1,65 +1,178 @@
 import streamlit as st
-import json
+import orjson
 import os
 import random
-import pandas as pd
-from datetime import datetime, timedelta
+from collections import defaultdict
+from datetime import date, datetime, timedelta
 
 # --- CONFIGURATION & CONSTANTS ---
-DATA_FILE = "forest_data.json"
+DATA_FILE = "forest_data.json"  # legacy single-file format
+STATE_FILE = "state.json"
+LOGS_FILE = "logs.jsonl"
+ARCHIVE_FILE = "logs_archive.jsonl"
+MAX_LIVE_LOGS = 500  # live window size; older rows overflow to ARCHIVE_FILE
 PRIMARY_GREEN = "#88B04B"
 DARK_BG = "#0D0D0D"
 CARD_BG = "#161B18"
+ARCHIVE_PAGE_SIZE = 50  # cards rendered before the "older entries" expander
+SPAN_TREE = '<span class="tree-emoji">🌲</span>'
+SPAN_FLOWER = '<span class="tree-emoji">🌸</span>'
+LOG_FIELDS = ("id", "date", "day_name", "task", "points", "tree", "effort")
 
 # --- DATA PERSISTENCE ---
+# Logs live in memory as parallel column lists (one list per field, in
+# append order, oldest first) instead of one dict per row: a single list
+# header per field rather than a 7-slot dict per entry, and filters touch
+# only the columns they need.
+def logs_to_columns(rows):
+    """Converts an oldest-first list of row dicts to parallel column lists."""
+    cols = {f: [] for f in LOG_FIELDS}
+    for row in rows:
+        for f in LOG_FIELDS:
+            cols[f].append(row[f])
+    return cols
+
+def iter_log_rows(cols, start=0, stop=None):
+    """Yields row dicts newest-first by zipping the column lists on demand."""
+    n = len(cols["id"])
+    stop = n if stop is None else min(stop, n)
+    for i in range(start, stop):
+        j = n - 1 - i
+        yield {f: cols[f][j] for f in LOG_FIELDS}
+
 def load_data():
-    """Loads user data from local JSON file or creates a new profile."""
-    if os.path.exists(DATA_FILE):
+    """Loads user data from state.json + logs.jsonl or creates a new profile."""
+    if os.path.exists(STATE_FILE):
         try:
-            with open(DATA_FILE, "r") as f:
-                data = json.load(f)
-                # Ensure structure compatibility
-                if "logs" not in data: data["logs"] = []
-                return data
+            with open(STATE_FILE, "rb") as f:
+                data = orjson.loads(f.read())
+            rows = []
+            if os.path.exists(LOGS_FILE):
+                with open(LOGS_FILE, "rb") as f:
+                    rows = [orjson.loads(line) for line in f]  # oldest-first
+            data["logs_cols"] = logs_to_columns(rows)
+            if "weekly" not in data: rebuild_weekly(data)
+            return data
+        except:
+            pass
+    # Migrate the legacy single-file format. Migration is incomplete while
+    # forest_data.json exists and state.json is absent, so it can safely
+    # re-run after a partial crash: logs.jsonl is written first, the atomic
+    # state.json replace in save_data is the commit point, and only then is
+    # the legacy file retired. An existing state.json (even a corrupt one)
+    # blocks migration, since posts made after it could already be in
+    # logs.jsonl and must not be overwritten.
+    if os.path.exists(DATA_FILE) and not os.path.exists(STATE_FILE):
+        try:
+            with open(DATA_FILE, "rb") as f:
+                data = orjson.loads(f.read())
+            legacy_logs = data.pop("logs", [])  # newest-first in the old format
+            legacy_logs.reverse()
+            data["logs_cols"] = logs_to_columns(legacy_logs)
+            if "weekly" not in data: rebuild_weekly(data)
+            with open(LOGS_FILE, "wb") as f:
+                for entry in legacy_logs:
+                    f.write(orjson.dumps(entry) + b"\n")
+            save_data(data)
+            os.replace(DATA_FILE, DATA_FILE + ".bak")  # retire the legacy file
+            return data
         except:
             pass
     return {
         "total_points": 0,
         "streak": 0,
         "last_post_date": None,
-        "logs": []
+        "logs_cols": {f: [] for f in LOG_FIELDS},
+        "weekly": [{"day_ordinal": None, "points": 0} for _ in range(7)]
     }
 
-def save_data(data):
-    """Saves the current state to forest_data.json."""
-    with open(DATA_FILE, "w") as f:
-        json.dump(data, f)
+def save_data(data, new_entry=None):
+    """Writes counters to state.json and appends any new log to logs.jsonl.
+
+    The log file is append-only, so a post costs one small write instead
+    of re-serializing the whole history. The state file is replaced
+    atomically so a crash mid-write can't leave it truncated.
+    """
+    tmp = STATE_FILE + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(orjson.dumps({k: v for k, v in data.items() if k != "logs_cols"}))
+    os.replace(tmp, STATE_FILE)
+    if new_entry is not None:
+        with open(LOGS_FILE, "ab") as f:
+            f.write(orjson.dumps(new_entry) + b"\n")
+
+def trim_logs(cols, overflow):
+    """Moves the oldest `overflow` rows into logs_archive.jsonl.
+
+    Keeps the live working set bounded at MAX_LIVE_LOGS: the archive file
+    only ever gains appends, and logs.jsonl is rewritten with the (small,
+    bounded) live window that remains. The rewrite goes through a temp
+    file and os.replace, same as save_data, so a crash mid-rewrite can't
+    truncate the live log.
+    """
+    with open(ARCHIVE_FILE, "ab") as f:
+        for i in range(overflow):
+            f.write(orjson.dumps({k: cols[k][i] for k in LOG_FIELDS}) + b"\n")
+    for k in LOG_FIELDS:
+        del cols[k][:overflow]
+    tmp = LOGS_FILE + ".tmp"
+    with open(tmp, "wb") as f:
+        for i in range(len(cols["id"])):
+            f.write(orjson.dumps({k: cols[k][i] for k in LOG_FIELDS}) + b"\n")
+    os.replace(tmp, LOGS_FILE)
+
+def rebuild_weekly(data):
+    """Rebuilds the 7-slot weekly ring buffer from the log history.
+
+    Each slot is keyed by day ordinal mod 7; stale slots read as zero,
+    so the ring only needs rebuilding when it is missing entirely. At
+    this data size plain dict accumulation beats the fixed overhead of
+    DataFrame construction by a wide margin.
+    """
+    today = datetime.now().date()
+    cutoff = (today - timedelta(days=6)).isoformat()
+    acc = defaultdict(int)
+    dates = data["logs_cols"]["date"]
+    points = data["logs_cols"]["points"]
+    for j in range(len(dates) - 1, -1, -1):  # newest last, walk backwards
+        if dates[j] < cutoff: break
+        acc[dates[j]] += points[j]
+    weekly = [{"day_ordinal": None, "points": 0} for _ in range(7)]
+    for i in range(7):
+        day = today - timedelta(days=6 - i)
+        weekly[day.toordinal() % 7] = {"day_ordinal": day.toordinal(),
+                                       "points": acc.get(day.isoformat(), 0)}
+    data["weekly"] = weekly
+    return data
 
 # --- GAME & LEVELING LOGIC ---
 def get_level(points):
     """Calculates level based on 500 points per level."""
     return (points // 500) + 1
 
-def get_tree_for_level(level):
+# Tree pools concatenated once at import time, keyed by level threshold
+_TREE_POOLS = (
+    (15, ('🌲', '🌳', '🌿', '🌴', '🌵', '🎍', '🌸', '🍂', '🍄', '🍀', '🎋', '🎐', '⛲')),
+    (7, ('🌲', '🌳', '🌿', '🌴', '🌵', '🎍', '🌸', '🍂', '🍄', '🍀')),
+    (3, ('🌲', '🌳', '🌿', '🌴', '🌵', '🎍')),
+    (0, ('🌲', '🌳', '🌿')),
+)
+
+def get_tree_for_level(level, rng=random):
     """Unlocks rarer trees as the user levels up."""
-    common = ['🌲', '🌳', '🌿']
-    uncommon = ['🌴', '🌵', '🎍']
-    rare = ['🌸', '🍂', '🍄', '🍀']
-    legendary = ['🎋', '🎐', '⛲']
-    
-    pool = list(common)
-    if level >= 3: pool += uncommon
-    if level >= 7: pool += rare
-    if level >= 15: pool += legendary
-    return random.choice(pool)
+    for threshold, pool in _TREE_POOLS:
+        if level >= threshold:
+            return rng.choice(pool)
 
-def update_streak_logic(data):
+def update_streak_logic(data, today=None):
     """Checks if the streak should be reset based on last post date."""
     if not data["last_post_date"]:
         return data
-        
-    last_date = datetime.strptime(data["last_post_date"], "%Y-%m-%d").date()
-    today = datetime.now().date()
+
+    # fromisoformat is a C fast path; strptime runs the full format engine
+    last_date = date.fromisoformat(data["last_post_date"])
+    if today is None:
+        today = datetime.now().date()
     diff = (today - last_date).days
     
     if diff > 1:
@@ -67,8 +180,8 @@ def update_streak_logic(data):
     return data
 
 # --- CUSTOM THEME (CSS) ---
-def apply_custom_styles():
-    st.markdown(f"""
+# Formatted once at import time; the colors never change between reruns
+_STYLE_HTML = f"""
         <style>
         /* Main Container */
         .stApp {{
@@ -127,141 +240,224 @@ def apply_custom_styles():
             color: white !important;
         }}
         </style>
-    """, unsafe_allow_html=True)
+    """
+
+def apply_custom_styles():
+    st.markdown(_STYLE_HTML, unsafe_allow_html=True)
+
+def build_cards_html(logs):
+    """Joins the archive task cards for a slice of logs into one HTML string."""
+    return "\n".join(f"""
+        <div class="task-card">
+            <div style="display: flex; justify-content: space-between; align-items: center;">
+                <span style="font-size: 1.2rem;">{log['tree']} <strong>{log['task']}</strong></span>
+                <span style="color: {PRIMARY_GREEN}; font-weight: bold; font-family: monospace;">+{log['points']}</span>
+            </div>
+            <div style="font-size: 0.8rem; color: #738276; margin-top: 5px;">
+                {log['day_name']}, {log['date']} • {log['effort']}
+            </div>
+        </div>
+    """ for log in logs)
+
+# --- TAB FRAGMENTS ---
+# Each tab body is a fragment, so a widget event inside one tab reruns
+# only that tab instead of the whole script (archive render included)
+@st.fragment
+def dashboard_fragment(data):
+    rng = st.session_state.rng
+    current_level = st.session_state.current_level
+
+    # One clock read per fragment run; every date below derives from these
+    _now = datetime.now()
+    _today = _now.date()
+    _today_str = _today.isoformat()
+
+    # User Input Form
+    with st.container():
+        st.markdown("### Plant a Task")
+        task_text = st.text_input("What did you accomplish?", placeholder="Describe your win...", label_visibility="collapsed")
+        effort_type = st.select_slider(
+            "Effort Level",
+            options=["Seed (Quick)", "Sapling (Solid)", "Oak (Big Win)"],
+            value="Sapling (Solid)"
+        )
+
+        if st.button("Post to Log", use_container_width=True):
+            if task_text:
+                # Point assignment logic
+                points_map = {"Seed (Quick)": (5, 15), "Sapling (Solid)": (20, 50), "Oak (Big Win)": (60, 150)}
+                low, high = points_map[effort_type]
+                pts_earned = rng.randint(low, high)
+
+                # Streak increment logic
+                today_str = _today_str
+                if data["last_post_date"] != today_str:
+                    data["streak"] += 1
+
+                # Entry creation
+                tree_icon = get_tree_for_level(current_level, rng)
+                new_entry = {
+                    "id": rng.getrandbits(32),
+                    "date": today_str,
+                    "day_name": _now.strftime("%A"),
+                    "task": task_text,
+                    "points": pts_earned,
+                    "tree": tree_icon,
+                    "effort": effort_type
+                }
+
+                for f in LOG_FIELDS:
+                    data["logs_cols"][f].append(new_entry[f])
+                data["total_points"] += pts_earned
+                data["last_post_date"] = today_str
+                st.session_state.current_level = get_level(data["total_points"])
+
+                # Roll today's points into the weekly ring buffer
+                today_ord = _today.toordinal()
+                slot = data["weekly"][today_ord % 7]
+                if slot["day_ordinal"] != today_ord:
+                    slot["day_ordinal"] = today_ord
+                    slot["points"] = 0
+                slot["points"] += pts_earned
+
+                save_data(data, new_entry)
+                n_logs = len(data["logs_cols"]["id"])
+                if n_logs > MAX_LIVE_LOGS:
+                    trim_logs(data["logs_cols"], n_logs - MAX_LIVE_LOGS)
+                st.toast(f"Planting Successful! +{pts_earned} points", icon=tree_icon)
+                # Points, level and streak live in the header outside this
+                # fragment, so escalate to a full-app rerun
+                st.rerun(scope="app")
+            else:
+                st.error("The forest needs a description to grow!")
+
+    st.divider()
+
+    # Weekly Momentum Graph (Pandas powered)
+    st.subheader("\U0001F4CA Weekly Momentum")
+    if data["logs_cols"]["id"]:
+        # Deferred so sessions that never render the chart skip the
+        # pandas import entirely; cached in sys.modules afterwards
+        import pandas as pd
+
+        # O(1) chart build from the weekly ring buffer; stale slots read 0
+        chart_rows = []
+        for i in range(7):
+            day = _today - timedelta(days=6 - i)
+            slot = data["weekly"][day.toordinal() % 7]
+            pts = slot["points"] if slot["day_ordinal"] == day.toordinal() else 0
+            chart_rows.append({"Day": day.strftime("%a"), "Points": pts})
+
+        st.bar_chart(pd.DataFrame(chart_rows).set_index("Day"), color="#88B04B")
+    else:
+        st.info("Log a task to start tracking your weekly momentum.")
+
+    # Visual Daily Forest
+    st.subheader("\U0001F343 Today's Growth")
+    today_date = _today_str
+    # Newest entries sit at the tail of the columns, so walk backwards
+    # and stop at the first non-today date
+    dates = data["logs_cols"]["date"]
+    first_today = len(dates)
+    while first_today > 0 and dates[first_today - 1] == today_date:
+        first_today -= 1
+
+    if first_today < len(dates):
+        tasks = data["logs_cols"]["task"]
+        trees = data["logs_cols"]["tree"]
+        trees_html = "".join(f'<span class="tree-emoji" title="{tasks[j]}">{trees[j]}</span>'
+                             for j in range(len(dates) - 1, first_today - 1, -1))
+        st.markdown(f'<div class="forest-box">{trees_html}</div>', unsafe_allow_html=True)
+    else:
+        st.markdown('<div class="forest-box"><p style="color:#738276; padding-top:40px;">No growth recorded yet today.</p></div>', unsafe_allow_html=True)
+
+@st.fragment
+def forest_fragment(data):
+    current_level = st.session_state.current_level
+
+    st.subheader("Your Living Streak")
+    st.write(f"This ecosystem flourishes as long as you maintain your streak. Current: {data['streak']} days.")
+
+    if data["streak"] > 0:
+        # Every 10th tree is a milestone flower; build via C-level repetition
+        streak = data["streak"]
+        forest_vis = (SPAN_TREE * 9 + SPAN_FLOWER) * (streak // 10) + SPAN_TREE * (streak % 10)
+        st.markdown(f'<div class="forest-box">{forest_vis}</div>', unsafe_allow_html=True)
+    else:
+        st.warning("Your forest is waiting for its first streak tree!")
+
+    st.info(f"Keep leveling up! Next rare tree tier unlocks at Level {current_level + 1}")
+
+@st.fragment
+def archive_fragment(data):
+    st.subheader("The Chronicles")
+    total_logs = len(data["logs_cols"]["id"])
+    if not total_logs:
+        st.write("Your history is currently a blank page.")
+    else:
+        # One markdown call for all cards: N render passes collapse into one
+        visible = iter_log_rows(data["logs_cols"], 0, ARCHIVE_PAGE_SIZE)
+        st.markdown(build_cards_html(visible), unsafe_allow_html=True)
+        if total_logs > ARCHIVE_PAGE_SIZE:
+            # An expander body runs on every pass regardless of its open
+            # state, so gate the older cards behind a session-state toggle:
+            # they are only assembled after the button is clicked
+            if not st.session_state.get("show_older_logs"):
+                if st.button(f"Show {total_logs - ARCHIVE_PAGE_SIZE} older entries"):
+                    st.session_state.show_older_logs = True
+            if st.session_state.get("show_older_logs"):
+                older = iter_log_rows(data["logs_cols"], ARCHIVE_PAGE_SIZE)
+                st.markdown(build_cards_html(older), unsafe_allow_html=True)
+
+    # Entries trimmed from the live window are read only on request; the
+    # choice persists in session state so the history survives reruns
+    if os.path.exists(ARCHIVE_FILE):
+        if not st.session_state.get("show_full_history"):
+            if st.button("Load full history"):
+                st.session_state.show_full_history = True
+        if st.session_state.get("show_full_history"):
+            with open(ARCHIVE_FILE, "rb") as f:
+                archived = [orjson.loads(line) for line in f]
+            archived.reverse()  # file is oldest-first
+            st.markdown(f"**Archived history ({len(archived)} entries)**")
+            st.markdown(build_cards_html(archived), unsafe_allow_html=True)
 
 # --- MAIN APPLICATION ---
 def main():
-    st.set_page_config(page_title="Forest Log", page_icon="🌲", layout="centered")
+    st.set_page_config(page_title="Forest Log", page_icon="\U0001F332", layout="centered")
     apply_custom_styles()
-    
+
     # Load session state
     if 'data' not in st.session_state:
-        st.session_state.data = update_streak_logic(load_data())
-    
+        st.session_state.data = update_streak_logic(load_data(), datetime.now().date())
+    if 'rng' not in st.session_state:
+        # Per-session generator: avoids the module-level Mersenne Twister lock
+        st.session_state.rng = random.Random()
+
     data = st.session_state.data
-    current_level = get_level(data["total_points"])
+    # Level only changes when points change, so derive it once per post
+    if 'current_level' not in st.session_state:
+        st.session_state.current_level = get_level(data["total_points"])
+    current_level = st.session_state.current_level
 
     # Header Metrics
-    st.title("🌲 Forest Done Log")
+    st.title("\U0001F332 Forest Done Log")
     m1, m2, m3 = st.columns(3)
     m1.metric("Points", f"{data['total_points']:,}")
     m2.metric("Level", current_level)
     m3.metric("Streak", f"{data['streak']} Days")
 
     # Tabbed Navigation
-    tab_dash, tab_forest, tab_log = st.tabs(["🌱 Dashboard", "🌳 My Forest", "📜 Archive"])
+    tab_dash, tab_forest, tab_log = st.tabs(["\U0001F331 Dashboard", "\U0001F333 My Forest", "\U0001F4DC Archive"])
 
-    # --- TAB 1: DASHBOARD ---
     with tab_dash:
-        # User Input Form
-        with st.container():
-            st.markdown("### Plant a Task")
-            task_text = st.text_input("What did you accomplish?", placeholder="Describe your win...", label_visibility="collapsed")
-            effort_type = st.select_slider(
-                "Effort Level",
-                options=["Seed (Quick)", "Sapling (Solid)", "Oak (Big Win)"],
-                value="Sapling (Solid)"
-            )
-            
-            if st.button("Post to Log", use_container_width=True):
-                if task_text:
-                    # Point assignment logic
-                    points_map = {"Seed (Quick)": (5, 15), "Sapling (Solid)": (20, 50), "Oak (Big Win)": (60, 150)}
-                    low, high = points_map[effort_type]
-                    pts_earned = random.randint(low, high)
-                    
-                    # Streak increment logic
-                    today_str = datetime.now().strftime("%Y-%m-%d")
-                    if data["last_post_date"] != today_str:
-                        data["streak"] += 1
-                    
-                    # Entry creation
-                    tree_icon = get_tree_for_level(current_level)
-                    new_entry = {
-                        "id": random.getrandbits(32),
-                        "date": today_str,
-                        "day_name": datetime.now().strftime("%A"),
-                        "task": task_text,
-                        "points": pts_earned,
-                        "tree": tree_icon,
-                        "effort": effort_type
-                    }
-                    
-                    data["logs"].insert(0, new_entry)
-                    data["total_points"] += pts_earned
-                    data["last_post_date"] = today_str
-                    
-                    save_data(data)
-                    st.toast(f"Planting Successful! +{pts_earned} points", icon=tree_icon)
-                    st.rerun()
-                else:
-                    st.error("The forest needs a description to grow!")
-
-        st.divider()
-
-        # Weekly Momentum Graph (Pandas powered)
-        st.subheader("📊 Weekly Momentum")
-        if data["logs"]:
-            df = pd.DataFrame(data["logs"])
-            df['date'] = pd.to_datetime(df['date'])
-            
-            # Generate the last 7 days of dates
-            last_7_days = [(datetime.now() - timedelta(days=i)).date() for i in range(6, -1, -1)]
-            chart_data = []
-            for d in last_7_days:
-                pts = df[df['date'].dt.date == d]['points'].sum()
-                chart_data.append({"Day": d.strftime("%a"), "Points": pts})
-            
-            st.bar_chart(pd.DataFrame(chart_data).set_index("Day"), color="#88B04B")
-        else:
-            st.info("Log a task to start tracking your weekly momentum.")
-
-        # Visual Daily Forest
-        st.subheader("🍃 Today's Growth")
-        today_date = datetime.now().strftime("%Y-%m-%d")
-        today_logs = [l for l in data["logs"] if l["date"] == today_date]
-        
-        if today_logs:
-            trees_html = "".join([f'<span class="tree-emoji" title="{l["task"]}">{l["tree"]}</span>' for l in today_logs])
-            st.markdown(f'<div class="forest-box">{trees_html}</div>', unsafe_allow_html=True)
-        else:
-            st.markdown('<div class="forest-box"><p style="color:#738276; padding-top:40px;">No growth recorded yet today.</p></div>', unsafe_allow_html=True)
+        dashboard_fragment(data)
 
-    # --- TAB 2: MY FOREST (STREAK VISUALIZATION) ---
     with tab_forest:
-        st.subheader("Your Living Streak")
-        st.write(f"This ecosystem flourishes as long as you maintain your streak. Current: {data['streak']} days.")
-        
-        if data["streak"] > 0:
-            forest_vis = ""
-            for i in range(data["streak"]):
-                # Every 10th tree is a milestone flower
-                icon = "🌸" if (i+1) % 10 == 0 else "🌲"
-                forest_vis += f'<span class="tree-emoji">{icon}</span>'
-            st.markdown(f'<div class="forest-box">{forest_vis}</div>', unsafe_allow_html=True)
-        else:
-            st.warning("Your forest is waiting for its first streak tree!")
-            
-        st.info(f"Keep leveling up! Next rare tree tier unlocks at Level {current_level + 1}")
-
-    # --- TAB 3: LOG ARCHIVE ---
+        forest_fragment(data)
+
     with tab_log:
-        st.subheader("The Chronicles")
-        if not data["logs"]:
-            st.write("Your history is currently a blank page.")
-        else:
-            for log in data["logs"]:
-                st.markdown(f"""
-                    <div class="task-card">
-                        <div style="display: flex; justify-content: space-between; align-items: center;">
-                            <span style="font-size: 1.2rem;">{log['tree']} <strong>{log['task']}</strong></span>
-                            <span style="color: {PRIMARY_GREEN}; font-weight: bold; font-family: monospace;">+{log['points']}</span>
-                        </div>
-                        <div style="font-size: 0.8rem; color: #738276; margin-top: 5px;">
-                            {log['day_name']}, {log['date']} • {log['effort']}
-                        </div>
-                    </div>
-                """, unsafe_allow_html=True)
+        archive_fragment(data)
 
 if __name__ == "__main__":
     main()